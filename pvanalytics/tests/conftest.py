@@ -13,6 +13,12 @@ def pytest_addoption(parser):
 
 def pytest_configure(config):
     config.addinivalue_line("markers", "slow: mark test as slow to run")
+    # pytest-xdist registers xdist_group itself. Registering it here
+    # avoids unknown-marker warnings when xdist is not installed.
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): run tests in the same group on one xdist worker"
+    )
 
 
 def pytest_collection_modifyitems(config, items):
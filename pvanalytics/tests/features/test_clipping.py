@@ -1,6 +1,6 @@
 """Tests for features.clipping"""
 import pytest
-from pandas.util.testing import assert_series_equal
+from pandas.testing import assert_series_equal
 import numpy as np
 import pandas as pd
 from pvanalytics.features import clipping
@@ -5,7 +5,7 @@ import pandas as pd
 import numpy as np
 
 import pytest
-from pandas.util.testing import assert_series_equal
+from pandas.testing import assert_series_equal
 
 from pvanalytics.quality import irradiance
 
@@ -1,7 +1,7 @@
 """Tests for the quality.outliers module."""
 import pandas as pd
 import numpy as np
-from pandas.util.testing import assert_series_equal
+from pandas.testing import assert_series_equal
 from pvanalytics.quality import outliers
 
 
@@ -1,9 +1,9 @@
 """Tests for time-related quality control functions."""
-from datetime import datetime
-import pytz
 import pytest
+import numpy as np
 import pandas as pd
-from pandas.util.testing import assert_series_equal
+import pvlib
+from pandas.testing import assert_series_equal
 from pvanalytics.quality import time
 
 
@@ -20,10 +20,9 @@ def times():
     for more information.
 
     """
-    MST = pytz.timezone('MST')
-    return pd.date_range(start=datetime(2018, 6, 15, 12, 0, 0, tzinfo=MST),
-                         end=datetime(2018, 6, 15, 13, 0, 0, tzinfo=MST),
-                         freq='10T')
+    return pd.date_range(start='2018-06-15 12:00',
+                         end='2018-06-15 13:00',
+                         freq='10min', tz='MST')
 
 
 def test_timestamp_spacing_date_range(times):
@@ -58,23 +57,73 @@ def test_timestamp_spacing_too_frequent(times):
     )
 
 
-@pytest.fixture(scope='module', params=['H', '15T', 'T'])
+def _cached_zenith(request, location, times):
+    # Return solar zenith for `location` at `times`.
+    #
+    # Computing solar position at one-minute resolution is slow, so the
+    # zenith values are stored in the pytest cache (.pytest_cache) and
+    # reused by later test sessions. Run pytest with --cache-clear to
+    # recompute them.
+    cache = getattr(request.config, 'cache', None)
+    key = 'pvanalytics/zenith/{}_{}_{}_{}_{}_{}_pvlib{}'.format(
+        location.latitude, location.longitude,
+        times[0].strftime('%Y%m%dT%H%M'), times[-1].strftime('%Y%m%dT%H%M'),
+        times.freqstr, str(times.tz).replace('/', '-'), pvlib.__version__
+    )
+    zenith = cache.get(key, None) if cache is not None else None
+    if zenith is None:
+        zenith = location.get_solarposition(times)['zenith'].tolist()
+        if cache is not None:
+            cache.set(key, zenith)
+    return pd.Series(zenith, index=times)
+
+
+def _midday_param(freq, *marks):
+    # Tests for each frequency share one expensive fixture value, so
+    # keep them on the same worker when running with
+    # `pytest -n 3 --dist loadgroup` (requires pytest-xdist).
+    return pytest.param(
+        freq,
+        marks=[pytest.mark.xdist_group(name='midday-' + freq), *marks]
+    )
+
+
+@pytest.fixture(scope='module',
+                params=[_midday_param('H'),
+                        _midday_param('15T'),
+                        _midday_param('T', pytest.mark.slow)])
 def midday(request, albuquerque):
-    solar_position = albuquerque.get_solarposition(
+    zenith = _cached_zenith(
+        request,
+        albuquerque,
         pd.date_range(
             start='1/1/2020', end='3/1/2020', closed='left',
             tz='MST', freq=request.param
         )
     )
-    mid_day = (solar_position['zenith'] < 87).groupby(
-        solar_position.index.date
-    ).apply(
-        lambda day: (day[day].index.min()
-                     + ((day[day].index.max() - day[day].index.min()) / 2))
+    daytime = zenith.values < 87
+    # The index is sorted, so the daytime samples of each day form one
+    # contiguous run. The first and last sample in each run are the
+    # earliest and latest daytime timestamps for that day.
+    daytime_times = zenith.index[daytime]
+    days = daytime_times.normalize()
+    day_ns = days.asi8
+    first = np.flatnonzero(np.r_[True, day_ns[1:] != day_ns[:-1]])
+    last = np.r_[first[1:], len(day_ns)] - 1
+    ns = daytime_times.asi8
+    mid_day = pd.to_datetime(
+        (ns[first] + ns[last]) // 2, utc=True
+    ).tz_convert('MST')
+    return pd.Series(
+        mid_day.hour * 60 + mid_day.minute,
+        index=days[first]
     )
-    mid_day = mid_day.dt.hour * 60 + mid_day.dt.minute
-    mid_day.index = pd.DatetimeIndex(mid_day.index, tz='MST')
-    return mid_day
+
+
+@pytest.fixture(scope='module')
+def no_shift(midday):
+    """Shift amount of 0 for every day in `midday`."""
+    return pd.Series(0, index=midday.index, dtype='int64')
 
 
 def requires_ruptures(test):
@@ -89,7 +138,7 @@ def requires_ruptures(test):
 
 
 @requires_ruptures
-def test_shift_ruptures_no_shift(midday):
+def test_shift_ruptures_no_shift(midday, no_shift):
     """Daytime mask with no time-shifts yields a series with 0s for
     shift amounts."""
     shift_mask, shift_amounts = time.shifts_ruptures(
@@ -98,79 +147,76 @@ def test_shift_ruptures_no_shift(midday):
     assert not shift_mask.any()
     assert_series_equal(
         shift_amounts,
-        pd.Series(0, index=midday.index, dtype='int64'),
+        no_shift,
         check_names=False
     )
 
 
 @requires_ruptures
-def test_shift_ruptures_positive_shift(midday):
-    """Every day shifted 1 hour later yields a series with shift
-     of 60 for each day."""
-    shifted = _shift_between(
-        midday, 60,
-        start='2020-01-01',
-        end='2020-02-29'
+@pytest.mark.parametrize(
+    'shift, start, end, expected_start, expected_end',
+    [pytest.param(60, '2020-01-01', '2020-02-29', '2020-01-01', '2020-02-29',
+                  id='positive'),
+     pytest.param(-60, '2020-01-01', '2020-02-29', '2020-01-01', '2020-02-29',
+                  id='negative'),
+     pytest.param(60, '2020-01-01', '2020-02-01', '2020-01-01', '2020-02-01',
+                  id='partial'),
+     pytest.param(60, '2020-02-01', '2020-02-29', '2020-02-02', '2020-02-29',
+                  id='at_end'),
+     pytest.param(60, '2020-01-25', '2020-02-15', '2020-01-26', '2020-02-15',
+                  id='in_middle')]
+)
+def test_shifts_ruptures_shifted_period(midday, shift, start, end,
+                                        expected_start, expected_end):
+    """Shifting the days between `start` and `end` yields a shift of
+    `shift` from `expected_start` through `expected_end` and 0
+    elsewhere."""
+    shifted = _shift_between(midday, shift, start=start, end=end)
+    shift_expected = _expected_shift(
+        shifted.index, expected_start, expected_end, shift
     )
-    expected_shift_mask = pd.Series(False, index=midday.index)
-    expected_shift_mask['2020-01-01':'2020-02-29'] = True
-    shift_mask, shift_amounts = time.shifts_ruptures(shifted, midday)
-    assert_series_equal(shift_mask, expected_shift_mask, check_names=False)
+    shift_mask, shift_amount = time.shifts_ruptures(shifted, midday)
+    assert_series_equal(shift_mask, shift_expected != 0, check_names=False)
     assert_series_equal(
-        shift_amounts,
-        pd.Series(60, index=shifted.index, dtype='int64'),
+        shift_amount,
+        shift_expected,
         check_names=False
     )
 
 
-@requires_ruptures
-def test_shift_ruptures_negative_shift(midday):
-    shifted = _shift_between(
-        midday, -60,
-        start='2020-01-01',
-        end='2020-02-29'
+def _shift_between(series, shift, start, end):
+    # Add `shift` to the values in `series` after `start` up to and
+    # including `end`.
+    i0 = series.index.searchsorted(
+        pd.Timestamp(start, tz=series.index.tz), side='right'
     )
-    expected_shift_mask = pd.Series(False, index=midday.index)
-    expected_shift_mask['2020-01-01':'2020-02-29'] = True
-    shift_mask, shift_amounts = time.shifts_ruptures(shifted, midday)
-    assert_series_equal(shift_mask, expected_shift_mask, check_names=False)
-    assert_series_equal(
-        shift_amounts,
-        pd.Series(-60, index=shifted.index, dtype='int64'),
-        check_names=False
+    i1 = series.index.searchsorted(
+        pd.Timestamp(end, tz=series.index.tz), side='right'
     )
+    shifted = series.values.copy()
+    shifted[i0:i1] += shift
+    return pd.Series(shifted, index=series.index, name=series.name)
 
 
-@requires_ruptures
-def test_shift_ruptures_partial_shift(midday):
-    shifted = _shift_between(
-        midday, 60,
-        start='2020-1-1', end='2020-2-1'
-    )
-    expected = pd.Series(60, index=midday.index)
-    expected.loc['2020-2-2':] = 0
-    expected_mask = expected != 0
-    shift_mask, shift_amount = time.shifts_ruptures(shifted, midday)
-    assert_series_equal(shift_mask, expected_mask, check_names=False)
-    assert_series_equal(
-        shift_amount,
-        expected,
-        check_names=False
+def _days_between(index, start, end):
+    # Return a slice selecting the positions of the days in `index`
+    # from `start` to `end`, inclusive.
+    return slice(
+        index.searchsorted(pd.Timestamp(start, tz=index.tz)),
+        index.searchsorted(pd.Timestamp(end, tz=index.tz), side='right')
     )
 
 
-def _shift_between(series, shift, start, end):
-    before = series[:start]
-    during = series[start:end]
-    after = series[end:]
-    during = during + shift
-    shifted = before.append(during).append(after)
-    return shifted[~shifted.index.duplicated()]
+def _expected_shift(index, start, end, shift):
+    # Return an int64 series over `index` that is `shift` for the days
+    # from `start` to `end`, inclusive, and 0 elsewhere.
+    shift_amount = np.zeros(len(index), dtype='int64')
+    shift_amount[_days_between(index, start, end)] = shift
+    return pd.Series(shift_amount, index=index)
 
 
 @requires_ruptures
-def test_shift_ruptures_period_min(midday):
-    no_shifts = pd.Series(0, index=midday.index, dtype='int64')
+def test_shift_ruptures_period_min(midday, no_shift):
     shift_mask, shift_amount = time.shifts_ruptures(
         midday, midday,
         period_min=len(midday)
@@ -178,7 +224,7 @@ def test_shift_ruptures_period_min(midday):
     assert not shift_mask.any()
     assert_series_equal(
         shift_amount,
-        no_shifts,
+        no_shift,
         check_names=False
     )
 
@@ -187,8 +233,9 @@ def test_shift_ruptures_period_min(midday):
         start='2020-01-01',
         end='2020-01-20'
     )
-    shift_expected = pd.Series(0, index=shifted.index, dtype='int64')
-    shift_expected.loc['2020-01-01':'2020-01-20'] = 60
+    shift_expected = _expected_shift(
+        shifted.index, '2020-01-01', '2020-01-20', 60
+    )
     expected_mask = shift_expected != 0
     shift_mask, shift_amount = time.shifts_ruptures(
         midday, midday, period_min=30
@@ -196,7 +243,7 @@ def test_shift_ruptures_period_min(midday):
     assert not shift_mask.any()
     assert_series_equal(
         shift_amount,
-        no_shifts,
+        no_shift,
         check_names=False
     )
     shift_mask, shift_amount = time.shifts_ruptures(
@@ -217,55 +264,15 @@ def test_shift_ruptures_period_min(midday):
 
 
 @requires_ruptures
-def test_shifts_ruptures_shift_at_end(midday):
-    shifted = _shift_between(
-        midday, 60,
-        start='2020-02-01',
-        end='2020-02-29'
-    )
-    shift_expected = pd.Series(0, index=shifted.index, dtype='int64')
-    shift_expected['2020-02-02':'2020-02-29'] = 60
-    shift_mask, shift_amount = time.shifts_ruptures(shifted, midday)
-    assert_series_equal(shift_mask, shift_expected != 0, check_names=False)
-    assert_series_equal(
-        shift_amount,
-        shift_expected,
-        check_names=False
-    )
-
-
-@requires_ruptures
-def test_shifts_ruptures_shift_in_middle(midday):
-    shifted = _shift_between(
-        midday, 60,
-        start='2020-01-25',
-        end='2020-02-15'
-    )
-    shift_expected = pd.Series(0, index=shifted.index, dtype='int64')
-    shift_expected['2020-01-26':'2020-02-15'] = 60
-    shift_mask, shift_amount = time.shifts_ruptures(shifted, midday)
-    assert_series_equal(
-        shift_mask,
-        shift_expected != 0,
-        check_names=False
-    )
-    assert_series_equal(
-        shift_amount,
-        shift_expected,
-        check_names=False
-    )
-
-
-@requires_ruptures
-def test_shift_ruptures_shift_min(midday):
+def test_shift_ruptures_shift_min(midday, no_shift):
     shifted = _shift_between(
         midday, 30,
         start='2020-01-01',
         end='2020-01-25',
     )
-    shift_expected = pd.Series(0, index=shifted.index, dtype='int64')
-    shift_expected.loc['2020-01-01':'2020-01-25'] = 30
-    no_shift = pd.Series(0, index=shifted.index, dtype='int64')
+    shift_expected = _expected_shift(
+        shifted.index, '2020-01-01', '2020-01-25', 30
+    )
     shift_mask, shift_amount = time.shifts_ruptures(
         shifted, midday,
         shift_min=60, round_up_from=40
@@ -280,19 +287,15 @@ def test_shift_ruptures_shift_min(midday):
         shifted, midday,
         shift_min=30
     )
-    assert_series_equal(
-        shift_mask,
-        shift_expected != 0 if pd.infer_freq(shifted.index) != 'H' else False,
-        check_names=False
-    )
+    assert_series_equal(shift_mask, shift_expected != 0, check_names=False)
     assert_series_equal(
         shift_amount,
-        shift_expected if pd.infer_freq(shifted.index) != 'H' else no_shift,
+        shift_expected,
         check_names=False
     )
 
 
-def test_shifts_ruptures_tz_localized(midday):
+def test_shifts_ruptures_tz_localized(midday, no_shift):
     shift_mask, shift_amount = time.shifts_ruptures(
         midday.tz_localize(None),
         midday
@@ -314,9 +317,7 @@ def test_shifts_ruptures_tz_localized(midday):
     assert shift_mask.index.tz == midday.index.tz
     assert_series_equal(
         shift_amount,
-        pd.Series(
-            0, index=midday.index, dtype='int64'
-        ),
+        no_shift,
         check_names=False
     )
     shift_mask, shift_amount = time.shifts_ruptures(
@@ -338,19 +339,16 @@ def test_rounding():
     xs = pd.Series(
         [-10, 10, -16, 16, -28, 28, -30, 30, -8, 8, -7, 7, -3, 3, 0]
     )
-    assert_series_equal(
-        time._round_multiple(xs, 15),
-        pd.Series([-15, 15, -15, 15, -30, 30, -30, 30, -15, 15, 0, 0, 0, 0, 0])
-    )
-    assert_series_equal(
-        time._round_multiple(xs, 15, up_from=9),
-        pd.Series([-15, 15, -15, 15, -30, 30, -30, 30, 0, 0, 0, 0, 0, 0, 0])
-    )
-    assert_series_equal(
-        time._round_multiple(xs, 15, up_from=15),
-        pd.Series([0, 0, -15, 15, -15, 15, -30, 30, 0, 0, 0, 0, 0, 0, 0])
-    )
-    assert_series_equal(
-        time._round_multiple(xs, 30),
-        pd.Series([0, 0, -30, 30, -30, 30, -30, 30, 0, 0, 0, 0, 0, 0, 0])
+    rounded = np.stack([
+        time._round_multiple(xs, to, up_from=up_from).to_numpy()
+        for to, up_from in [(15, None), (15, 9), (15, 15), (30, None)]
+    ])
+    np.testing.assert_array_equal(
+        rounded,
+        np.array([
+            [-15, 15, -15, 15, -30, 30, -30, 30, -15, 15, 0, 0, 0, 0, 0],
+            [-15, 15, -15, 15, -30, 30, -30, 30, 0, 0, 0, 0, 0, 0, 0],
+            [0, 0, -15, 15, -15, 15, -30, 30, 0, 0, 0, 0, 0, 0, 0],
+            [0, 0, -30, 30, -30, 30, -30, 30, 0, 0, 0, 0, 0, 0, 0]
+        ])
     )
@@ -1,6 +1,6 @@
 """Tests for utility functions."""
 import pandas as pd
-from pandas.util.testing import assert_series_equal
+from pandas.testing import assert_series_equal
 import pytest
 from pvanalytics.quality import util
 